@@ -1,11 +1,128 @@
 import requests
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import re
+from reminders import reminder_scheduler
+from weather import create_weather_service
+import config
+
+TIME_UNITS = {
+    'second': 'seconds', 'sec': 'seconds',
+    'minute': 'minutes', 'min': 'minutes',
+    'hour': 'hours', 'hr': 'hours',
+    'day': 'days',
+    'week': 'weeks'
+}
+
+CLOCK_TIME = re.compile(r'\bat\s+(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b', re.I)
+# A bare "at N" only counts as a time when nothing but a connecting word follows it
+CLOCK_PHRASE_END = re.compile(
+    r'\s*(?:$|[.,!?;]|(?:to|about|that|for|tomorrow|today|tonight|this|in\s+the)\b)', re.I
+)
+DAY_PART = re.compile(r'\b(?:tonight|(?:this|in\s+the)\s+(morning|afternoon|evening))\b', re.I)
+
+def parse_reminder(message, now=None, utc_offset=None):
+    """Extract (due_at, text) from a reminder request; due_at is naive UTC.
+
+    Times like "at 5pm" are read in the client's timezone when utc_offset
+    (minutes east of UTC) is given, otherwise in the server's local time.
+    A bare hour ("at 5") means its next occurrence today, 1-6 as PM on later
+    days, unless "tonight" or "this morning" etc. says otherwise.
+    Returns None when no time can be found.
+    """
+    if utc_offset is not None:
+        local_now = (now or datetime.utcnow()) + timedelta(minutes=utc_offset)
+    else:
+        local_now = now or datetime.now()
+    text = message
+    due_at = None
+    
+    relative = re.search(r'\bin\s+(\d+|an?|one)\s+(sec|second|min|minute|hr|hour|day|week)s?\b', text, re.I)
+    clock = None
+    for match in CLOCK_TIME.finditer(text):
+        if match.group(2) or match.group(3) or CLOCK_PHRASE_END.match(text, match.end()):
+            clock = match
+            break
+    tomorrow = re.search(r'\btomorrow\b', text, re.I)
+    day_part = DAY_PART.search(text)
+    
+    days_ahead = 0
+    if relative:
+        amount = relative.group(1).lower()
+        amount = 1 if amount in ('a', 'an', 'one') else int(amount)
+        unit = TIME_UNITS[relative.group(2).lower()]
+        text = text.replace(relative.group(0), ' ')
+        if unit not in ('days', 'weeks') or not clock:
+            due_at = local_now + timedelta(**{unit: amount})
+        else:
+            # "in 2 days at 5pm": move the day, then apply the clock time below
+            days_ahead = amount * (7 if unit == 'weeks' else 1)
+    elif tomorrow:
+        days_ahead = 1
+    
+    if due_at is None and (clock or days_ahead):
+        hour, minute = 9, 0  # Default to 9 AM for a bare "tomorrow"
+        if clock:
+            hour, minute = int(clock.group(1)), int(clock.group(2) or 0)
+            meridiem = (clock.group(3) or '').lower()
+            if not meridiem and day_part and 1 <= hour <= 12:
+                meridiem = 'am' if (day_part.group(1) or '').lower() == 'morning' else 'pm'
+            if meridiem and not 1 <= hour <= 12:
+                return None
+            if meridiem == 'pm' and hour < 12:
+                hour += 12
+            elif meridiem == 'am' and hour == 12:
+                hour = 0
+            if hour > 23 or minute > 59:
+                return None
+            text = text.replace(clock.group(0), ' ')
+            if day_part:
+                text = text.replace(day_part.group(0), ' ')
+        
+        day = local_now + timedelta(days=days_ahead)
+        due_at = day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if tomorrow:
+            text = text.replace(tomorrow.group(0), ' ')
+        if clock and not meridiem and 1 <= hour <= 12:
+            # Bare 12-hour time: its next AM/PM occurrence, or 1-6 and 12 as PM on a later day
+            morning = due_at.replace(hour=hour % 12)
+            afternoon = due_at.replace(hour=hour % 12 + 12)
+            if days_ahead:
+                due_at = afternoon if hour <= 6 or hour == 12 else morning
+            else:
+                due_at = next((t for t in (morning, afternoon) if t > local_now), morning + timedelta(days=1))
+        elif not days_ahead and due_at <= local_now:
+            due_at += timedelta(days=1)
+    
+    if not due_at:
+        return None
+    
+    text = re.sub(r'^.*?\bremind(?:er)?\s+(?:me\s+)?(?:to\s+|about\s+|that\s+|for\s+)?', '', text, flags=re.I)
+    text = re.sub(r'\s+', ' ', text).strip(' .,!?')
+    text = re.sub(r'^(?:to|about|that|for)\s+', '', text, flags=re.I)
+    
+    # Store in UTC like the rest of the database
+    if utc_offset is not None:
+        due_at -= timedelta(minutes=utc_offset)
+    else:
+        due_at = due_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return due_at, text or 'Reminder'
+
+def parse_weather_location(message):
+    """Extract a city name from messages like 'weather in Paris today?' or 'weather for tomorrow in Paris'"""
+    # Try every preposition: the first may introduce a time ("for tomorrow") rather than a place
+    for match in re.finditer(r'\b(?:in|for|at)\s+(?=[a-zA-Z])', message):
+        words = re.match(r"[a-zA-Z .'-]*", message[match.end():]).group(0)
+        city = re.split(r'\b(?:today|tomorrow|tonight|now|right now|this|please|in|for|at)\b', words, flags=re.I)[0]
+        city = city.strip(' .,!?')
+        if city:
+            return city
+    return None
 
 class ActionsModule:
     def __init__(self):
-        self.weather_api_key = None  # Add your OpenWeatherMap API key if needed
+        self.weather_api_key = config.Config.WEATHER_API_KEY
+        self.weather_service = create_weather_service()
     
     def detect_action(self, message):
         """Detect if message contains an action request"""
@@ -22,12 +139,15 @@ class ActionsModule:
         
         return None
     
-    def execute_action(self, action_type, message, user_preferred_name):
-        """Execute the detected action"""
+    def execute_action(self, action_type, message, user_preferred_name, user_id=None, utc_offset=None, dry_run=False):
+        """Execute the detected action; utc_offset is the client's offset from UTC in minutes.
+
+        With dry_run=True actions are worked out and reported but nothing is scheduled.
+        """
         if action_type == 'weather':
             return self.get_weather(message, user_preferred_name)
         elif action_type == 'reminder':
-            return self.set_reminder(message, user_preferred_name)
+            return self.set_reminder(message, user_preferred_name, user_id, utc_offset, dry_run)
         elif action_type == 'open_website':
             return self.open_website(message, user_preferred_name)
         elif action_type == 'current_time':
@@ -36,21 +156,63 @@ class ActionsModule:
         return None
     
     def get_weather(self, message, user_name):
-        """Get weather information (placeholder implementation)"""
-        # This would integrate with a weather API like OpenWeatherMap
+        """Get current weather for the city named in the message"""
+        if not self.weather_service:
+            return {
+                'type': 'weather',
+                'response': f"Sorry {user_name}, weather service is currently unavailable. Please check your favorite weather app for current conditions.",
+                'data': None
+            }
+        
+        city = parse_weather_location(message)
+        if not city:
+            return {
+                'type': 'weather',
+                'response': f"{user_name}, which city should I check? Try something like \"weather in London\".",
+                'data': None
+            }
+        
+        try:
+            weather = self.weather_service.get_current(city=city)
+        except Exception as e:
+            print(f"Weather error: {e}")
+            weather = None
+            city = None
+        
+        if not weather:
+            response = (f"Sorry {user_name}, I couldn't find weather for {city}." if city else
+                        f"Sorry {user_name}, weather service is currently unavailable. Please try again later.")
+            return {'type': 'weather', 'response': response, 'data': None}
+        
         return {
             'type': 'weather',
-            'response': f"Sorry {user_name}, weather service is currently unavailable. Please check your favorite weather app for current conditions.",
-            'data': None
+            'response': f"{user_name}, it's currently {weather['temperature']}°C with {weather['description']} in {weather['location']}.",
+            'data': weather
         }
     
-    def set_reminder(self, message, user_name):
-        """Set a reminder (placeholder implementation)"""
-        # Extract time and task from message
+    def set_reminder(self, message, user_name, user_id=None, utc_offset=None, dry_run=False):
+        """Parse a reminder from the message and hand it to the scheduler (unless dry_run)"""
+        parsed = parse_reminder(message, utc_offset=utc_offset)
+        if not parsed or not (user_id or dry_run):
+            return {
+                'type': 'reminder',
+                'response': f"{user_name}, I couldn't work out when to remind you. Try something like \"remind me to call mom in 20 minutes\" or \"remind me at 5pm to stretch\".",
+                'data': None
+            }
+        
+        due_at, text = parsed
+        reminder_id = None if dry_run else reminder_scheduler.schedule(user_id, text, due_at)
+        
+        # Echo the time back in the user's timezone when we know it
+        if utc_offset is not None:
+            due_local = due_at + timedelta(minutes=utc_offset)
+        else:
+            due_local = due_at.replace(tzinfo=timezone.utc).astimezone()
+        when = due_local.strftime("%Y-%m-%d %H:%M")
         return {
             'type': 'reminder',
-            'response': f"Okay {user_name}, I've noted your reminder. In a full implementation, this would set an actual reminder for you!",
-            'data': {'message': message}
+            'response': f"Okay {user_name}, I'll remind you to {text} at {when}.",
+            'data': {'id': str(reminder_id) if reminder_id else None, 'text': text, 'due_at': due_at.isoformat() + 'Z'}
         }
     
     def open_website(self, message, user_name):
@@ -2,14 +2,26 @@
 import google.generativeai as genai
 import config
 from memory import MemoryManager
+from singleflight import SingleFlight
+import hashlib
+import re
+import threading
 import time
 import random
 
+# Stand-in names used in prompts shared between users; swapped for real names afterwards
+SHARED_USER_NAME = "USER_NAME"
+SHARED_CHATBOT_NAME = "ASSISTANT_NAME"
+
 class AIEngine:
     def __init__(self):
         self.memory_manager = MemoryManager()
         self.last_request_time = 0
-        self.request_delay = 2  # 2 seconds between requests to avoid rate limits
+        self.request_delay = 60 / config.Config.GEMINI_REQUESTS_PER_MINUTE  # Spacing between requests to stay within quota
+        self.throttle_lock = threading.Lock()
+        self.singleflight = SingleFlight()
+        self.coalesced_requests = 0  # Callers served by another caller's in-flight Gemini call
+        self.stats_lock = threading.Lock()
         
         # Configure Gemini API only if key is available
         api_key = config.Config.GEMINI_API_KEY
@@ -27,14 +39,18 @@ class AIEngine:
             print("❌ No Gemini API key found, using fallback mode")
             self.api_available = False
 
-    def generate_response(self, user_id, user_message, conversation_history=None):
-        """Generate AI response with fallback to rule-based responses"""
+    def generate_response(self, user_id, user_message, conversation_history=None, shareable=False):
+        """Generate AI response with fallback to rule-based responses.
+
+        With shareable=True the prompt is built without per-user history or names,
+        so identical questions already in flight share a single Gemini call.
+        Callers with history only join a call that is already in flight;
+        otherwise they keep their history and get their own call.
+        """
         try:
-            # Rate limiting
-            current_time = time.time()
-            if current_time - self.last_request_time < self.request_delay:
-                time.sleep(self.request_delay)
-            self.last_request_time = current_time
+            # Rate limiting (shared calls are throttled once, by the leading caller)
+            if not (shareable and self.api_available):
+                self._throttle()
 
             user = self.memory_manager.get_user_by_id(user_id)
             if not user:
@@ -46,6 +62,13 @@ class AIEngine:
             # Try Gemini API first if available
             if self.api_available:
                 try:
+                    if shareable:
+                        response = self._generate_shared_response(
+                            preferred_name, chatbot_name, user_message, lead=not conversation_history
+                        )
+                        if response is not None:
+                            return response
+                        self._throttle()
                     return self._generate_gemini_response(
                         preferred_name, chatbot_name, user_message, conversation_history
                     )
@@ -61,6 +84,38 @@ class AIEngine:
         except Exception as e:
             return f"Hello {preferred_name}! I'm here to help. (System temporarily using simple responses)"
 
+    def stream_response(self, user_id, user_message, conversation_history=None):
+        """Yield the AI response in chunks as they are generated"""
+        self._throttle()
+        
+        user = self.memory_manager.get_user_by_id(user_id)
+        if not user:
+            yield "I'm sorry, I couldn't find your user information."
+            return
+        
+        preferred_name = user.get("preferred_name", "User")
+        chatbot_name = user.get("chatbot_name", "AI Assistant")
+        
+        if self.api_available:
+            context = self._build_context(preferred_name, chatbot_name, conversation_history or [])
+            prompt = f"{context}\n\nUser: {user_message}\n{chatbot_name}:"
+            started = False
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    text = chunk.text
+                    if not started:
+                        text = self._clean_response(text, chatbot_name)
+                        started = True
+                    yield text.replace("**", "")
+                return
+            except Exception as e:
+                print(f"Gemini API error, using fallback: {e}")
+                self.api_available = False
+                if started:
+                    return
+        
+        yield self._generate_fallback_response(preferred_name, chatbot_name, user_message)
+
     def _generate_gemini_response(self, preferred_name, chatbot_name, user_message, conversation_history):
         """Generate response using Gemini API"""
         context = self._build_context(preferred_name, chatbot_name, conversation_history or [])
@@ -69,6 +124,51 @@ class AIEngine:
         response = self.model.generate_content(prompt)
         return self._clean_response(response.text, chatbot_name)
 
+    def _generate_shared_response(self, preferred_name, chatbot_name, user_message, lead=True):
+        """Generate a response from a user-independent prompt, coalescing identical in-flight prompts.
+
+        With lead=False the caller only joins a call already in flight and
+        gets None when there is none.
+        """
+        context = self._build_context(SHARED_USER_NAME, SHARED_CHATBOT_NAME, [])
+        prompt = f"{context}\n\nUser: {user_message}\n{SHARED_CHATBOT_NAME}:"
+        key = self._prompt_key(prompt)
+        
+        if lead:
+            response, shared = self.singleflight.do(key, self._generate_from_prompt, prompt)
+        else:
+            joined = self.singleflight.join(key)
+            if joined is None:
+                return None
+            response, shared = joined
+        if shared:
+            with self.stats_lock:
+                self.coalesced_requests += 1
+        
+        # Re-apply personalization for this user
+        response = response.replace(SHARED_USER_NAME, preferred_name).replace(SHARED_CHATBOT_NAME, chatbot_name)
+        return self._clean_response(response, chatbot_name)
+
+    def _generate_from_prompt(self, prompt):
+        """Throttled raw Gemini call"""
+        self._throttle()
+        return self.model.generate_content(prompt).text
+
+    def _prompt_key(self, prompt):
+        """Key on the prompt with case, punctuation and whitespace differences removed"""
+        normalized = re.sub(r'[^\w\s]', '', prompt.lower())
+        normalized = ' '.join(normalized.split())
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def _throttle(self):
+        """Wait for the next free request slot; concurrent callers get consecutive slots"""
+        with self.throttle_lock:
+            current_time = time.time()
+            slot = max(current_time, self.last_request_time + self.request_delay)
+            self.last_request_time = slot
+        if slot > current_time:
+            time.sleep(slot - current_time)
+
     def _generate_fallback_response(self, preferred_name, chatbot_name, user_message):
         """Generate intelligent fallback responses without API"""
         message_lower = user_message.lower()
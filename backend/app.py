@@ -5,16 +5,25 @@ except AttributeError:
     import importlib_metadata
     importlib.metadata.packages_distributions = importlib_metadata.packages_distributions
 
+# Fork the password hashing workers before any module below opens clients or starts threads
+from password_hashing import password_hasher
+password_hasher.start()
+
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
+from flask_sock import Sock
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
 import config
 from auth import init_auth, register_routes as register_auth_routes
-from ai_engine import ai_engine
+from profiling import init_profiling
 from speech_module import speech_module
 from memory import MemoryManager
-from search_module import search_module
-from actions import actions_module
+from chat_pipeline import process_message
+from ai_engine import ai_engine
+from batch import register_routes as register_batch_routes
+from reminders import reminder_scheduler
+from retention import retention_worker
+from voice_session import register_routes as register_voice_routes
 import os
 import tempfile
 
@@ -25,6 +34,7 @@ app.config.from_object(config.Config)
 # Initialize extensions
 CORS(app, origins=app.config['CORS_ORIGINS'])
 init_auth(app)
+init_profiling(app)
 
 # Initialize memory manager
 memory_manager = MemoryManager()
@@ -32,6 +42,17 @@ memory_manager = MemoryManager()
 # Register authentication routes
 register_auth_routes(app)
 
+# Register batch chat routes
+register_batch_routes(app, memory_manager)
+
+# Register the WebSocket voice pipeline
+sock = Sock(app)
+register_voice_routes(sock, memory_manager)
+
+# Start firing reminders and compacting old conversations in the background
+reminder_scheduler.start()
+retention_worker.start()
+
 @app.route('/api/chat', methods=['POST'])
 @jwt_required()
 def chat():
@@ -52,64 +73,26 @@ def chat():
         # Get conversation history
         conversation_history = memory_manager.get_conversation_history(user_id)
         
-        # Check for actions first
-        action_type = actions_module.detect_action(user_message)
-        if action_type:
-            action_result = actions_module.execute_action(
-                action_type, user_message, user['preferred_name']
-            )
-            if action_result:
-                # Add to conversation history
-                new_messages = conversation_history + [
-                    {'role': 'user', 'content': user_message},
-                    {'role': 'assistant', 'content': action_result['response']}
-                ]
-                memory_manager.save_conversation(user_id, new_messages)
-                
-                return jsonify({
-                    'response': action_result['response'],
-                    'action': action_result,
-                    'chatbot_name': user['chatbot_name']
-                })
-        
-        # Check for knowledge queries
-        if ai_engine.is_knowledge_query(user_message):
-            search_results = search_module.web_search(user_message)
-            if search_results:
-                # Add search context to message
-                search_context = search_module.format_search_results(search_results)
-                enhanced_message = f"{user_message}\n\nContext from web search:\n{search_context}"
-                
-                # Generate AI response with search context
-                ai_response = ai_engine.generate_response(
-                    user_id, enhanced_message, conversation_history
-                )
-                
-                # Add search links to response
-                ai_response += "\n\n**Sources:**\n" + "\n".join(
-                    [f"- [{result['title']}]({result['link']})" for result in search_results[:3]]
-                )
-            else:
-                ai_response = ai_engine.generate_response(
-                    user_id, user_message, conversation_history
-                )
-        else:
-            # Regular AI response
-            ai_response = ai_engine.generate_response(
-                user_id, user_message, conversation_history
-            )
+        utc_offset = data.get('utc_offset')
+        if not isinstance(utc_offset, int):
+            utc_offset = None
+        
+        result = process_message(user_id, user, user_message, conversation_history, utc_offset=utc_offset)
         
         # Update conversation history
         new_messages = conversation_history + [
             {'role': 'user', 'content': user_message},
-            {'role': 'assistant', 'content': ai_response}
+            {'role': 'assistant', 'content': result['response']}
         ]
         memory_manager.save_conversation(user_id, new_messages)
         
-        return jsonify({
-            'response': ai_response,
+        response = {
+            'response': result['response'],
             'chatbot_name': user['chatbot_name']
-        })
+        }
+        if result['action']:
+            response['action'] = result['action']
+        return jsonify(response)
         
     except Exception as e:
         return jsonify({'error': f'Chat processing failed: {str(e)}'}), 500
@@ -204,10 +187,33 @@ def clear_chat_history():
     except Exception as e:
         return jsonify({'error': f'Failed to clear chat history: {str(e)}'}), 500
 
+@app.route('/api/reminders/due', methods=['GET'])
+@jwt_required()
+def get_due_reminders():
+    """Return reminders that have fired since the last poll"""
+    try:
+        user_id = get_jwt_identity()
+        reminders = memory_manager.pop_fired_reminders(user_id)
+        
+        return jsonify({
+            'reminders': [{
+                'id': str(r['_id']),
+                'text': r['text'],
+                'due_at': r['due_at'].isoformat() + 'Z'
+            } for r in reminders]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to get reminders: {str(e)}'}), 500
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'message': 'AI Assistant API is running'})
+    return jsonify({
+        'status': 'healthy',
+        'message': 'AI Assistant API is running',
+        'coalesced_llm_requests': ai_engine.coalesced_requests
+    })
 
 if __name__ == '__main__':
     app.run(debug=True, use_reloader=False, host='0.0.0.0', port=5000)
@@ -1,14 +1,21 @@
 from flask import jsonify, request
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
+from pymongo.errors import DuplicateKeyError
 from memory import MemoryManager
+from password_hashing import password_hasher
 import re
 
 memory_manager = MemoryManager()
 jwt = JWTManager()
 
 def init_auth(app):
+    # No-op when app.py already started the pool; covers other entry points
+    password_hasher.start()
     jwt.init_app(app)
+    try:
+        memory_manager.ensure_user_indexes()
+    except Exception as e:
+        print(f"❌ User index creation failed, signup disabled until it succeeds: {e}")
 
 def validate_email(email):
     """Validate email format"""
@@ -32,24 +39,31 @@ def register_routes(app):
             if not validate_email(data['email']):
                 return jsonify({'error': 'Invalid email format'}), 400
             
-            # Check if user already exists
-            if memory_manager.get_user_by_username(data['username']):
-                return jsonify({'error': 'Username already exists'}), 409
-            
-            if memory_manager.get_user_by_email(data['email']):
-                return jsonify({'error': 'Email already exists'}), 409
+            # Duplicate detection relies on the unique indexes, so refuse signups until they exist
+            if not memory_manager.user_indexes_ready:
+                try:
+                    memory_manager.ensure_user_indexes()
+                except Exception as e:
+                    print(f"User index creation failed: {e}")
+                    return jsonify({'error': 'Signup is temporarily unavailable'}), 503
             
             # Hash password
-            password_hash = generate_password_hash(data['password'])
-            
-            # Create user
-            user_id = memory_manager.create_user(
-                username=data['username'],
-                email=data['email'],
-                password_hash=password_hash,
-                preferred_name=data['preferredName'],
-                chatbot_name=data['chatbotName']
-            )
+            password_hash = password_hasher.hash(data['password'])
+            
+            # Create user; unique indexes reject taken usernames and emails
+            try:
+                user_id = memory_manager.create_user(
+                    username=data['username'],
+                    email=data['email'],
+                    password_hash=password_hash,
+                    preferred_name=data['preferredName'],
+                    chatbot_name=data['chatbotName']
+                )
+            except DuplicateKeyError as e:
+                key_pattern = (e.details or {}).get('keyPattern') or {}
+                if 'email' in key_pattern or 'email_1' in str(e):
+                    return jsonify({'error': 'Email already exists'}), 409
+                return jsonify({'error': 'Username already exists'}), 409
             
             # Create access token
             access_token = create_access_token(identity=user_id)
@@ -81,7 +95,7 @@ def register_routes(app):
             else:
                 user = memory_manager.get_user_by_username(identifier)
             
-            if not user or not check_password_hash(user['password'], password):
+            if not user or not password_hasher.verify(user['password'], password):
                 return jsonify({'error': 'Invalid credentials'}), 401
             
             access_token = create_access_token(identity=str(user['_id']))
@@ -0,0 +1,148 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import Response, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from chat_pipeline import process_message
+from profiling import profiled
+import config
+
+def parse_messages(lines):
+    """Yield {'id', 'message'} items from NDJSON ({"id": ..., "message": ...}) or plain-text lines.
+
+    Lines that cannot be parsed yield {'id', 'error'} instead, so one bad line
+    doesn't abort the rest of the batch.
+    """
+    for index, line in enumerate(lines):
+        try:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith('{'):
+                yield {'id': index, 'message': line}
+                continue
+            item = json.loads(line)
+            message = item.get('message', '')
+            if not isinstance(message, str):
+                yield {'id': item.get('id', index), 'error': 'message must be a string'}
+                continue
+            yield {'id': item.get('id', index), 'message': message.strip()}
+        except (ValueError, AttributeError) as e:
+            yield {'id': index, 'error': f'Invalid line: {e}'}
+
+def run_batch(memory_manager, user_id, user, items, workers=None, dry_run=False):
+    """Run messages through the chat pipeline in parallel, yielding results as they complete.
+
+    Each message is answered independently with an empty history. At most
+    `workers` messages run at once and only a few more are read ahead, so large
+    inputs are streamed rather than loaded. Unless dry_run is set, results are
+    saved to the user's conversation history one at a time.
+    """
+    workers = workers or config.Config.BATCH_MAX_WORKERS
+
+    def run_one(item_id, message):
+        started = time.perf_counter()
+        result = {'id': item_id, 'message': message}
+        try:
+            if not message:
+                raise ValueError('Message cannot be empty')
+            output = process_message(user_id, user, message, [], allow_side_effects=not dry_run)
+            result['response'] = output['response']
+            if output['action']:
+                result['action'] = output['action']['type']
+        except Exception as e:
+            result['error'] = str(e)
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    # Sample the pool threads too when this runs inside a profiled request
+    run_one = profiled(run_one)
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * 2:
+                item = next(items, None)
+                if item is None:
+                    exhausted = True
+                elif 'error' in item:
+                    yield item
+                else:
+                    pending.add(pool.submit(run_one, item['id'], item['message']))
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if not dry_run and 'response' in result:
+                    conversation_history = memory_manager.get_conversation_history(user_id)
+                    memory_manager.save_conversation(user_id, conversation_history + [
+                        {'role': 'user', 'content': result['message']},
+                        {'role': 'assistant', 'content': result['response']}
+                    ])
+                yield result
+
+def register_routes(app, memory_manager):
+
+    @app.route('/api/chat/batch', methods=['POST'])
+    @jwt_required()
+    def chat_batch():
+        """Run a file of messages (multipart 'file', or JSON 'messages') and stream NDJSON results"""
+        user_id = get_jwt_identity()
+        user = memory_manager.get_user_by_id(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        if 'file' in request.files:
+            items = parse_messages(request.files['file'].stream)
+        else:
+            data = request.get_json(silent=True) or {}
+            messages = data.get('messages')
+            if not isinstance(messages, list):
+                return jsonify({'error': 'Provide a messages file or a messages list'}), 400
+            items = ({'id': i, 'message': m.strip()} if isinstance(m, str)
+                     else {'id': i, 'error': 'message must be a string'}
+                     for i, m in enumerate(messages))
+
+        dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        workers = min(request.args.get('workers', config.Config.BATCH_MAX_WORKERS, type=int),
+                      config.Config.BATCH_MAX_WORKERS)
+
+        def generate():
+            for result in run_batch(memory_manager, user_id, user, items, max(workers, 1), dry_run):
+                yield json.dumps(result, default=str) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a file of chat messages through the assistant, writing NDJSON results')
+    parser.add_argument('--user', required=True, help='Username whose profile the messages run as')
+    parser.add_argument('--input', default='-', help='NDJSON or one-message-per-line file (default: stdin)')
+    parser.add_argument('--output', default='-', help='NDJSON output file (default: stdout)')
+    parser.add_argument('--workers', type=int, default=config.Config.BATCH_MAX_WORKERS)
+    parser.add_argument('--dry-run', action='store_true', help="Don't save results to conversation history")
+    args = parser.parse_args()
+
+    from memory import MemoryManager
+    memory_manager = MemoryManager()
+    user = memory_manager.get_user_by_username(args.user)
+    if not user:
+        sys.exit(f"User not found: {args.user}")
+
+    # Read bytes so an undecodable line is reported per line by parse_messages
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    with source, output:
+        for result in run_batch(memory_manager, str(user['_id']), user, parse_messages(source),
+                                args.workers, args.dry_run):
+            output.write(json.dumps(result, default=str) + '\n')
+            output.flush()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+from ai_engine import ai_engine
+from search_module import search_module
+from actions import actions_module
+
+def run_action(user_id, user, user_message, allow_side_effects=True, utc_offset=None):
+    """Execute the action the message asks for, if any; returns the action result or None"""
+    action_type = actions_module.detect_action(user_message)
+    if not action_type:
+        return None
+    return actions_module.execute_action(
+        action_type, user_message, user['preferred_name'],
+        user_id, utc_offset, dry_run=not allow_side_effects
+    )
+
+def build_prompt(user_message):
+    """Add web search context to knowledge queries.
+
+    Returns (prompt, search_results, shareable). Search-grounded prompts don't
+    depend on the user, so identical questions asked concurrently can share
+    one LLM call.
+    """
+    if ai_engine.is_knowledge_query(user_message):
+        search_results = search_module.web_search(user_message)
+        if search_results:
+            search_context = search_module.format_search_results(search_results)
+            prompt = f"{user_message}\n\nContext from web search:\n{search_context}"
+            return prompt, search_results, True
+    return user_message, None, False
+
+def format_sources(search_results):
+    """Markdown list of the top search results, appended to grounded answers"""
+    return "\n\n**Sources:**\n" + "\n".join(
+        [f"- [{result['title']}]({result['link']})" for result in search_results[:3]]
+    )
+
+def process_message(user_id, user, user_message, conversation_history, allow_side_effects=True, utc_offset=None):
+    """Run a message through action detection, web search and the AI engine.
+
+    Returns {'response': str, 'action': dict or None}. Nothing is persisted
+    here; with allow_side_effects=False actions such as reminders are
+    reported but not scheduled. utc_offset is the client's offset from UTC in minutes.
+    """
+    # Check for actions first
+    action_result = run_action(user_id, user, user_message, allow_side_effects, utc_offset)
+    if action_result:
+        return {'response': action_result['response'], 'action': action_result}
+    
+    # Check for knowledge queries
+    prompt, search_results, shareable = build_prompt(user_message)
+    ai_response = ai_engine.generate_response(
+        user_id, prompt, conversation_history, shareable=shareable
+    )
+    if search_results:
+        ai_response += format_sources(search_results)
+    
+    return {'response': ai_response, 'action': None}
@@ -11,6 +11,7 @@ class Config:
     
     # Gemini API Configuration
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', 'your-gemini-api-key-here')
+    GEMINI_REQUESTS_PER_MINUTE = int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', 30))
     
     # Web Search API (Using SerpAPI as example)
     SERPAPI_KEY = os.getenv('SERPAPI_KEY', 'your-serpapi-key-here')
@@ -19,8 +20,38 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-here')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     
+    # Password hashing cost (PBKDF2-SHA256 iterations) and hashing process pool size
+    PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', 600000))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    
     # Flask Configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-flask-secret-key')
     
     # CORS Configuration
     CORS_ORIGINS = ['http://localhost:3000']
+    
+    # Reminder scheduler: how far ahead (seconds) pending reminders are loaded into memory
+    REMINDER_WINDOW_SECONDS = int(os.getenv('REMINDER_WINDOW_SECONDS', 300))
+    
+    # Weather: provider is 'openweathermap' or 'local' (offline stand-in); results cached for WEATHER_CACHE_TTL seconds
+    WEATHER_PROVIDER = os.getenv('WEATHER_PROVIDER', 'openweathermap')
+    WEATHER_API_KEY = os.getenv('WEATHER_API_KEY')
+    WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', 600))
+    
+    # Admin user ids (comma-separated), allowed to use admin endpoints
+    ADMIN_USER_IDS = [u.strip() for u in os.getenv('ADMIN_USER_IDS', '').split(',') if u.strip()]
+    
+    # Request profiling: admins send PROFILE_HEADER, or a PROFILE_SAMPLE_RATE fraction of requests is sampled
+    PROFILE_HEADER = 'X-Profile'
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0.0))
+    PROFILE_BUFFER_SIZE = int(os.getenv('PROFILE_BUFFER_SIZE', 50))
+    
+    # Conversation retention: daily conversations older than CONVERSATION_HOT_DAYS are compacted
+    # into compressed monthly archives. Set CONVERSATION_RETENTION_DAYS to delete everything older
+    # than that many days; 0 or unset keeps history forever
+    CONVERSATION_HOT_DAYS = int(os.getenv('CONVERSATION_HOT_DAYS', 7))
+    CONVERSATION_RETENTION_DAYS = int(os.getenv('CONVERSATION_RETENTION_DAYS') or 0)
+    CONVERSATION_COMPACTION_INTERVAL = int(os.getenv('CONVERSATION_COMPACTION_INTERVAL', 3600))
+    
+    # Batch chat: parallel workers per batch
+    BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 4))
@@ -0,0 +1,137 @@
+import argparse
+import gzip
+import os
+import sys
+from bson import json_util
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+import config
+
+# Collections moved by export/import, with the field linking documents to a user
+COLLECTIONS = {
+    'users': '_id',
+    'conversations': 'user_id',
+    'conversation_archive': 'user_id'
+}
+
+JSON_OPTIONS = json_util.CANONICAL_JSON_OPTIONS
+
+def export_data(db, path, user_ids=None, batch_size=1000):
+    """Stream collections into gzip-compressed NDJSON in constant memory.
+
+    Each line is {"collection": name, "doc": document} in canonical Extended
+    JSON, so ObjectIds, dates and binary payloads survive the round trip.
+    Returns the number of documents written per collection.
+    """
+    counts = {}
+    with gzip.open(path, 'wt', encoding='utf-8') as out:
+        for name, user_field in COLLECTIONS.items():
+            query = {user_field: {'$in': user_ids}} if user_ids else {}
+            # No sort: a user filter walks the user_id index, a full export scans in natural order;
+            # sorting on _id could force a blocking in-memory sort or an _id index scan
+            cursor = db[name].find(query).batch_size(batch_size)
+            counts[name] = 0
+            for doc in cursor:
+                out.write(json_util.dumps({'collection': name, 'doc': doc}, json_options=JSON_OPTIONS))
+                out.write('\n')
+                counts[name] += 1
+    return counts
+
+def read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+def write_checkpoint(path, line_number):
+    # Write then rename so a crash never leaves a half-written checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(str(line_number))
+    os.replace(tmp_path, path)
+
+def import_data(db, path, checkpoint_path=None, batch_size=1000):
+    """Load an export with batched upserts, resuming after the last checkpointed line.
+
+    Documents are upserted by _id, so replaying lines after a crash is safe.
+    Returns the number of documents written per collection.
+    """
+    start_line = read_checkpoint(checkpoint_path) if checkpoint_path else 0
+    buffers = {name: [] for name in COLLECTIONS}
+    counts = {name: 0 for name in COLLECTIONS}
+    buffered = 0
+    line_number = 0
+
+    def flush():
+        for name, operations in buffers.items():
+            if not operations:
+                continue
+            written = len(operations)
+            try:
+                db[name].bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # e.g. a username already taken by another _id on the target cluster
+                for err in e.details['writeErrors']:
+                    print(f"Skipped {name} document: {err['errmsg']}", file=sys.stderr)
+                written -= len(e.details['writeErrors'])
+            counts[name] += written
+            operations.clear()
+        if checkpoint_path:
+            write_checkpoint(checkpoint_path, line_number)
+
+    with gzip.open(path, 'rt', encoding='utf-8') as source:
+        for line_number, line in enumerate(source, 1):
+            if line_number <= start_line or not line.strip():
+                continue
+            record = json_util.loads(line, json_options=JSON_OPTIONS)
+            name = record['collection']
+            if name not in buffers:
+                raise ValueError(f"Unknown collection '{name}' on line {line_number}")
+            doc = record['doc']
+            buffers[name].append(ReplaceOne({'_id': doc['_id']}, doc, upsert=True))
+            buffered += 1
+            if buffered >= batch_size:
+                flush()
+                buffered = 0
+        flush()
+
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Export or import users and conversations as gzip-compressed NDJSON')
+    parser.add_argument('--mongo-uri', help='MongoDB connection string (defaults to MONGO_URI)')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help='Write collections to a .ndjson.gz file')
+    export_parser.add_argument('output')
+    export_parser.add_argument('--user', action='append', help='Only export this username (repeatable)')
+
+    import_parser = commands.add_parser('import', help='Load a .ndjson.gz export')
+    import_parser.add_argument('input')
+    import_parser.add_argument('--checkpoint', help='Checkpoint file used to resume an interrupted import')
+
+    args = parser.parse_args()
+    if args.mongo_uri:
+        config.Config.MONGO_URI = args.mongo_uri
+
+    from memory import MemoryManager
+    db = MemoryManager().db
+
+    if args.command == 'export':
+        user_ids = None
+        if args.user:
+            users = list(db.users.find({'username': {'$in': args.user}}, {'_id': 1}))
+            if not users:
+                sys.exit('No matching users found')
+            user_ids = [u['_id'] for u in users]
+        counts = export_data(db, args.output, user_ids, args.batch_size)
+    else:
+        counts = import_data(db, args.input, args.checkpoint, args.batch_size)
+
+    for name, count in counts.items():
+        print(f"{name}: {count} documents")
+
+if __name__ == '__main__':
+    main()
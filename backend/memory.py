@@ -1,18 +1,24 @@
 # memory.py - Complete version
-from pymongo import MongoClient
-from bson import ObjectId
-from datetime import datetime
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+from bson import ObjectId, Binary
+from datetime import datetime, timedelta
+import json
+import zlib
 import config
 
 class MemoryManager:
     def __init__(self):
         self.client = MongoClient(config.Config.MONGO_URI)
+        self.user_indexes_ready = False
         self.db = self.client.ai_assistant
         self.users = self.db.users
         self.conversations = self.db.conversations
+        self.conversation_archive = self.db.conversation_archive
+        self.reminders = self.db.reminders
     
     def create_user(self, username, email, password_hash, preferred_name, chatbot_name):
-        """Create a new user in database"""
+        """Create a new user in database; raises DuplicateKeyError if username or email is taken"""
         user_data = {
             'username': username,
             'email': email,
@@ -26,6 +32,12 @@ class MemoryManager:
         result = self.users.insert_one(user_data)
         return str(result.inserted_id)
     
+    def ensure_user_indexes(self):
+        """Enforce unique usernames and emails so signup can be a single insert"""
+        self.users.create_index('username', unique=True)
+        self.users.create_index('email', unique=True)
+        self.user_indexes_ready = True
+    
     def get_user_by_username(self, username):
         """Get user by username"""
         return self.users.find_one({'username': username})
@@ -84,8 +96,166 @@ class MemoryManager:
         for conv in conversations:
             all_messages.extend(conv['messages'])
         
+        # Users inactive past the hot window only have compacted history left
+        if not all_messages:
+            all_messages = self._latest_archived_messages(user_id) + all_messages
+        
         return all_messages[-20:]  # Return last 20 messages
     
+    def _latest_archived_messages(self, user_id):
+        """Messages of the newest archived day (each day already carries earlier context)"""
+        bucket = self.conversation_archive.find_one(
+            {'user_id': ObjectId(user_id)},
+            {'days': {'$slice': -1}},
+            sort=[('month', DESCENDING)]
+        )
+        if not bucket or not bucket.get('days'):
+            return []
+        return json.loads(zlib.decompress(bucket['days'][-1]['messages']))
+    
     def clear_conversation_history(self, user_id):
         """Clear user's conversation history"""
-        self.conversations.delete_many({'user_id': ObjectId(user_id)})
\ No newline at end of file
+        self.conversations.delete_many({'user_id': ObjectId(user_id)})
+        self.conversation_archive.delete_many({'user_id': ObjectId(user_id)})
+    
+    def ensure_conversation_indexes(self):
+        """Create history, archive and (when retention is enabled) TTL indexes for conversations"""
+        self.conversations.create_index([('user_id', ASCENDING), ('last_updated', DESCENDING)])
+        self.conversation_archive.create_index(
+            [('user_id', ASCENDING), ('month', ASCENDING)], unique=True
+        )
+        
+        retention_days = config.Config.CONVERSATION_RETENTION_DAYS
+        retention = int(timedelta(days=retention_days).total_seconds()) if retention_days else None
+        # Compaction scans on last_updated; with retention enabled the TTL index serves it too
+        self._ensure_single_field_index(self.conversations, 'last_updated', retention)
+        if retention:
+            # Archive buckets carry their own expiry time
+            self._ensure_single_field_index(self.conversation_archive, 'expires_at', 0)
+        else:
+            # Keep forever: remove the archive TTL index left over from an earlier retention setting
+            self._drop_index(self.conversation_archive, 'expires_at_1')
+    
+    def _drop_index(self, collection, name):
+        try:
+            collection.drop_index(name)
+        except OperationFailure:
+            pass  # Index does not exist
+    
+    def _ensure_single_field_index(self, collection, field, expire_after=None):
+        """Create an ascending index on field, as a TTL index when expire_after is set.
+
+        An existing index with another TTL is updated in place with collMod;
+        one that gains or loses its TTL is rebuilt.
+        """
+        existing = collection.index_information().get(f'{field}_1')
+        if existing is not None and existing.get('expireAfterSeconds') != expire_after:
+            if expire_after is not None and 'expireAfterSeconds' in existing:
+                self.db.command('collMod', collection.name, index={
+                    'keyPattern': {field: 1}, 'expireAfterSeconds': expire_after
+                })
+                return
+            collection.drop_index(f'{field}_1')
+        if expire_after is None:
+            collection.create_index(field)
+        else:
+            collection.create_index(field, expireAfterSeconds=expire_after)
+    
+    def compact_conversations(self, older_than, batch_size=500):
+        """Move daily conversations older than `older_than` into compressed monthly archive buckets.
+
+        Each day is stored as zlib-compressed JSON inside a per-user, per-month
+        bucket. With retention enabled the bucket expires once its newest day
+        passes the retention horizon. Returns the number of daily documents compacted.
+        """
+        retention_days = config.Config.CONVERSATION_RETENTION_DAYS
+        retention = timedelta(days=retention_days) if retention_days else None
+        compacted = 0
+        
+        while True:
+            batch = list(self.conversations.find(
+                {'last_updated': {'$lt': older_than}}
+            ).sort('last_updated', ASCENDING).limit(batch_size))
+            if not batch:
+                break
+            
+            buckets = {}
+            days = []
+            for conv in batch:
+                last_updated = conv['last_updated']
+                month = datetime(last_updated.year, last_updated.month, 1)
+                buckets[(conv['user_id'], month)] = UpdateOne(
+                    {'user_id': conv['user_id'], 'month': month},
+                    {'$setOnInsert': {'days': []}},
+                    upsert=True
+                )
+                payload = zlib.compress(json.dumps(conv['messages'], default=str).encode())
+                # The $ne guard skips days already archived by an interrupted earlier run
+                update = {'$push': {'days': {
+                    'conversation_id': conv['_id'],
+                    'last_updated': last_updated,
+                    'messages': Binary(payload)
+                }}}
+                if retention:
+                    update['$max'] = {'expires_at': last_updated + retention}
+                days.append(UpdateOne(
+                    {'user_id': conv['user_id'], 'month': month, 'days.conversation_id': {'$ne': conv['_id']}},
+                    update
+                ))
+            
+            try:
+                self.conversation_archive.bulk_write(list(buckets.values()), ordered=False)
+            except BulkWriteError as e:
+                # A concurrent compactor created the same bucket first
+                if any(err['code'] != 11000 for err in e.details['writeErrors']):
+                    raise
+            self.conversation_archive.bulk_write(days, ordered=False)
+            
+            self.conversations.delete_many({'_id': {'$in': [conv['_id'] for conv in batch]}})
+            compacted += len(batch)
+        
+        return compacted
+    
+    def ensure_reminder_indexes(self):
+        """Create the indexes used by the reminder scheduler"""
+        self.reminders.create_index([('status', ASCENDING), ('due_at', ASCENDING)])
+        self.reminders.create_index([('user_id', ASCENDING), ('status', ASCENDING)])
+    
+    def create_reminder(self, user_id, text, due_at):
+        """Store a pending reminder and return its id"""
+        result = self.reminders.insert_one({
+            'user_id': ObjectId(user_id),
+            'text': text,
+            'due_at': due_at,
+            'status': 'pending',
+            'created_at': datetime.utcnow()
+        })
+        return result.inserted_id
+    
+    def get_pending_reminders(self, before):
+        """Get pending reminders due before `before` (overdue ones included), ordered by due time"""
+        return self.reminders.find({
+            'status': 'pending',
+            'due_at': {'$lt': before}
+        }, {'due_at': 1}).sort('due_at', ASCENDING)
+    
+    def mark_reminder_fired(self, reminder_id):
+        """Flip a reminder from pending to fired, returning the fired document"""
+        return self.reminders.find_one_and_update(
+            {'_id': reminder_id, 'status': 'pending'},
+            {'$set': {'status': 'fired', 'fired_at': datetime.utcnow()}}
+        )
+    
+    def pop_fired_reminders(self, user_id):
+        """Claim fired reminders for a user, marking each delivered exactly once"""
+        claimed = []
+        while True:
+            # Atomic per reminder, so concurrent polls never both return the same one
+            reminder = self.reminders.find_one_and_update(
+                {'user_id': ObjectId(user_id), 'status': 'fired'},
+                {'$set': {'status': 'delivered', 'delivered_at': datetime.utcnow()}},
+                sort=[('due_at', ASCENDING)]
+            )
+            if not reminder:
+                return claimed
+            claimed.append(reminder)
@@ -0,0 +1,62 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+import config
+
+class PasswordHasher:
+    """Runs password hashing in a bounded worker pool, off the request thread.
+
+    hashlib releases the GIL while hashing, but each PBKDF2 call still burns a
+    core for its full cost. Hashing in a small separate pool caps how much CPU
+    a login burst can take from chat traffic, and jobs waiting on the pool are
+    capped so a burst cannot queue unbounded work.
+    """
+
+    def __init__(self):
+        self.method = f"pbkdf2:sha256:{config.Config.PASSWORD_HASH_ITERATIONS}"
+        self.max_workers = config.Config.PASSWORD_HASH_WORKERS
+        self.slots = threading.BoundedSemaphore(self.max_workers * 4)
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Create the pool and fork its workers.
+
+        Call this before any threads are started or clients (pymongo, gRPC)
+        are opened, since forking a multi-threaded process is unsafe; app.py
+        does so before its other imports. The fork context is used
+        explicitly: spawn-based workers would re-import the app module and
+        repeat its startup. Where fork is unavailable, a thread pool is used
+        instead, which still works because hashlib releases the GIL.
+        """
+        with self.lock:
+            if self.pool is not None:
+                return
+            if 'fork' in multiprocessing.get_all_start_methods():
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('fork')
+                )
+                # With fork, the first submit launches every worker at once
+                self.pool.submit(int).result()
+            else:
+                self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def _submit(self, fn, *args):
+        if self.pool is None:
+            self.start()
+        if not self.slots.acquire(timeout=30):
+            raise RuntimeError('Password hashing queue is full')
+        try:
+            return self.pool.submit(fn, *args).result()
+        finally:
+            self.slots.release()
+
+    def hash(self, password):
+        return self._submit(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._submit(check_password_hash, password_hash, password)
+
+# Global instance
+password_hasher = PasswordHasher()
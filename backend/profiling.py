@@ -0,0 +1,192 @@
+import functools
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from flask import g, has_request_context, jsonify, request, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+import config
+
+class StackSampler:
+    """Samples a set of threads' Python stacks at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_ids = {thread_id}
+        self.interval = interval
+        self.stacks = Counter()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        return self.stacks
+
+    def add_thread(self, thread_id):
+        self.thread_ids.add(thread_id)
+
+    def remove_thread(self, thread_id):
+        self.thread_ids.discard(thread_id)
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.thread_ids):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+
+def profiled(fn):
+    """Wrap fn so the worker thread running it is sampled along with the current request.
+
+    Call it on the request thread before handing fn to a pool; outside a
+    profiled request fn is returned unchanged.
+    """
+    sampler = g.get('profile_sampler') if has_request_context() else None
+    if sampler is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        thread_id = threading.get_ident()
+        sampler.add_thread(thread_id)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sampler.remove_thread(thread_id)
+    return wrapper
+
+class RequestProfiler:
+    """Opt-in request profiling kept in a bounded ring buffer.
+
+    A request is profiled when an admin sends the profile header, or at random
+    with probability PROFILE_SAMPLE_RATE.
+    """
+
+    def __init__(self):
+        self.sample_rate = config.Config.PROFILE_SAMPLE_RATE
+        self.header = config.Config.PROFILE_HEADER
+        self.admin_ids = config.Config.ADMIN_USER_IDS
+        self.profiles = deque(maxlen=config.Config.PROFILE_BUFFER_SIZE)
+        self.lock = threading.Lock()
+
+    def is_admin(self):
+        try:
+            verify_jwt_in_request(optional=True)
+            return get_jwt_identity() in self.admin_ids
+        except Exception:
+            return False
+
+    def should_profile(self):
+        if request.headers.get(self.header) and self.is_admin():
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def before_request(self):
+        if request.path.startswith('/api/admin/profiles') or not self.should_profile():
+            return
+        g.profiler = g.profile_sampler = StackSampler(threading.get_ident())
+        g.profile_started = time.perf_counter()
+        g.profiler.start()
+
+    def after_request(self, response):
+        sampler = g.pop('profiler', None)
+        if sampler is None:
+            return response
+
+        # Keep sampling until the body has been sent; streamed responses
+        # (e.g. NDJSON batch results) do their real work after this hook,
+        # partly on worker threads registered through profiled()
+        profile = {
+            'id': uuid.uuid4().hex[:12],
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'created_at': datetime.utcnow().isoformat() + 'Z'
+        }
+        started = g.profile_started
+
+        def finish():
+            stacks = sampler.stop()
+            profile['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            profile['samples'] = sum(stacks.values())
+            profile['stacks'] = stacks
+            with self.lock:
+                self.profiles.append(profile)
+
+        response.call_on_close(finish)
+        response.headers['X-Profile-Id'] = profile['id']
+        return response
+
+    def teardown_request(self, exc):
+        # Requests that error out skip after_request; make sure the sampler stops
+        sampler = g.pop('profiler', None)
+        if sampler is not None:
+            sampler.stop()
+
+    def list_profiles(self):
+        with self.lock:
+            return [{k: v for k, v in p.items() if k != 'stacks'} for p in reversed(self.profiles)]
+
+    def get_profile(self, profile_id):
+        with self.lock:
+            return next((p for p in self.profiles if p['id'] == profile_id), None)
+
+def collapsed_stacks(stacks):
+    """Render stacks in the collapsed format read by flamegraph.pl and speedscope"""
+    return '\n'.join(f"{stack} {count}" for stack, count in stacks.most_common()) + '\n'
+
+def flamegraph_tree(stacks):
+    """Render stacks as a nested {name, value, children} tree for d3-flame-graph"""
+    root = {'name': 'root', 'value': 0, 'children': []}
+    for stack, count in stacks.items():
+        root['value'] += count
+        node = root
+        for name in stack.split(';'):
+            child = next((c for c in node['children'] if c['name'] == name), None)
+            if child is None:
+                child = {'name': name, 'value': 0, 'children': []}
+                node['children'].append(child)
+            child['value'] += count
+            node = child
+    return root
+
+request_profiler = RequestProfiler()
+
+def init_profiling(app):
+    app.before_request(request_profiler.before_request)
+    app.after_request(request_profiler.after_request)
+    app.teardown_request(request_profiler.teardown_request)
+
+    @app.route('/api/admin/profiles', methods=['GET'])
+    @jwt_required()
+    def list_profiles():
+        if get_jwt_identity() not in request_profiler.admin_ids:
+            return jsonify({'error': 'Admin access required'}), 403
+        return jsonify({'profiles': request_profiler.list_profiles()})
+
+    @app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+    @jwt_required()
+    def get_profile(profile_id):
+        if get_jwt_identity() not in request_profiler.admin_ids:
+            return jsonify({'error': 'Admin access required'}), 403
+
+        profile = request_profiler.get_profile(profile_id)
+        if not profile:
+            return jsonify({'error': 'Profile not found'}), 404
+
+        if request.args.get('format', 'collapsed') == 'flamegraph':
+            return jsonify(flamegraph_tree(profile['stacks']))
+        return Response(collapsed_stacks(profile['stacks']), mimetype='text/plain')
@@ -0,0 +1,114 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+from memory import MemoryManager
+import config
+
+class ReminderScheduler:
+    """Fires reminders from an in-memory heap holding only the near-term window.
+
+    Pending reminders live in MongoDB indexed on (status, due_at). The scheduler
+    periodically loads every pending reminder due before `now + window` into a
+    heap, sleeps until the earliest one is due, and flips it to 'fired'. Each
+    refresh re-reads from the start of the range, so reminders inserted by
+    other processes are picked up too. Clients pick fired reminders up on
+    their next poll, or via a registered listener for push delivery.
+    """
+
+    def __init__(self, window_seconds=None):
+        self.memory_manager = MemoryManager()
+        self.window = timedelta(seconds=window_seconds or config.Config.REMINDER_WINDOW_SECONDS)
+        self.refresh = min(self.window / 2, timedelta(seconds=30))
+        self.heap = []
+        self.queued = set()
+        self.next_refresh = None
+        self.listeners = []
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        """Start the background scheduler thread"""
+        if self.thread:
+            return
+        try:
+            self.memory_manager.ensure_reminder_indexes()
+        except Exception as e:
+            print(f"Reminder index creation failed: {e}")
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the background scheduler thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def add_listener(self, callback):
+        """Register callback(reminder_doc) to be called when a reminder fires"""
+        self.listeners.append(callback)
+
+    def schedule(self, user_id, text, due_at):
+        """Persist a reminder; push it onto the heap right away if it is near-term"""
+        reminder_id = self.memory_manager.create_reminder(user_id, text, due_at)
+        if due_at < datetime.utcnow() + self.window:
+            self._push(due_at, reminder_id)
+        return reminder_id
+
+    def _push(self, due_at, reminder_id):
+        with self.condition:
+            if reminder_id in self.queued:
+                return
+            self.queued.add(reminder_id)
+            heapq.heappush(self.heap, (due_at, reminder_id))
+            self.condition.notify()
+
+    def _load_window(self, now):
+        """Queue every pending reminder due before the horizon, including overdue ones"""
+        for doc in self.memory_manager.get_pending_reminders(now + self.window):
+            self._push(doc['due_at'], doc['_id'])
+        self.next_refresh = now + self.refresh
+
+    def _fire(self, reminder_id):
+        """Mark a reminder as fired and notify listeners"""
+        reminder = self.memory_manager.mark_reminder_fired(reminder_id)
+        if not reminder:
+            return  # Already fired by another worker
+        for callback in self.listeners:
+            try:
+                callback(reminder)
+            except Exception as e:
+                print(f"Reminder listener error: {e}")
+
+    def _run(self):
+        while self.running:
+            now = datetime.utcnow()
+            try:
+                if self.next_refresh is None or now >= self.next_refresh:
+                    self._load_window(now)
+
+                due = []
+                with self.condition:
+                    while self.heap and self.heap[0][0] <= now:
+                        reminder_id = heapq.heappop(self.heap)[1]
+                        self.queued.discard(reminder_id)
+                        due.append(reminder_id)
+                # Firing is idempotent, so a reminder queued by several workers fires once
+                for reminder_id in due:
+                    self._fire(reminder_id)
+            except Exception as e:
+                print(f"Reminder scheduler error: {e}")
+
+            # Sleep until the next reminder is due or the window needs refreshing
+            with self.condition:
+                if not self.running:
+                    break
+                wake_at = self.next_refresh or now + self.refresh
+                if self.heap:
+                    wake_at = min(wake_at, self.heap[0][0])
+                timeout = (wake_at - datetime.utcnow()).total_seconds()
+                self.condition.wait(timeout=max(timeout, 1))
+
+# Global instance
+reminder_scheduler = ReminderScheduler()
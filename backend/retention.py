@@ -0,0 +1,54 @@
+import threading
+from datetime import datetime, timedelta
+from memory import MemoryManager
+import config
+
+class RetentionWorker:
+    """Periodically compacts cold daily conversations into the compressed archive.
+
+    Expiry past the retention horizon (if one is configured) is left to MongoDB
+    TTL indexes, so this worker only ever touches documents that have aged out
+    of the hot window.
+    """
+
+    def __init__(self):
+        self.memory_manager = MemoryManager()
+        self.hot_window = timedelta(days=config.Config.CONVERSATION_HOT_DAYS)
+        self.interval = config.Config.CONVERSATION_COMPACTION_INTERVAL
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Create indexes and start the background compaction thread"""
+        if self.thread:
+            return
+        try:
+            self.memory_manager.ensure_conversation_indexes()
+        except Exception as e:
+            print(f"Conversation index creation failed: {e}")
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run_once(self):
+        """Compact everything older than the hot window; returns the number of documents moved"""
+        return self.memory_manager.compact_conversations(datetime.utcnow() - self.hot_window)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                compacted = self.run_once()
+                if compacted:
+                    print(f"Compacted {compacted} conversations into the archive")
+            except Exception as e:
+                print(f"Conversation compaction error: {e}")
+            self.stop_event.wait(self.interval)
+
+# Global instance
+retention_worker = RetentionWorker()
+
+if __name__ == '__main__':
+    retention_worker.memory_manager.ensure_conversation_indexes()
+    print(f"Compacted {retention_worker.run_once()} conversations into the archive")
@@ -0,0 +1,56 @@
+import threading
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still in flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) once per in-flight key; returns (result, shared)"""
+        with self.lock:
+            call = self.calls.get(key)
+            if call:
+                leader = False
+            else:
+                call = self.calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            return self._wait(call)
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result, False
+
+    def join(self, key):
+        """Share the result of an in-flight call for key; returns (result, True), or None if there is none"""
+        with self.lock:
+            call = self.calls.get(key)
+        if not call:
+            return None
+        return self._wait(call)
+
+    def _wait(self, call):
+        call.done.wait()
+        if call.error:
+            raise call.error
+        return call.result, True
@@ -8,6 +8,7 @@ class SpeechModule:
     def __init__(self):
         self.recognizer = sr.Recognizer()
         self.tts_engine = pyttsx3.init()
+        self.tts_lock = threading.Lock()  # pyttsx3 engine is not safe to drive from several threads
         self.setup_tts()
     
     def setup_tts(self):
@@ -32,6 +33,28 @@ class SpeechModule:
         except Exception as e:
             return f"Error processing audio: {e}"
     
+    def recognize_pcm(self, pcm_data, sample_rate, sample_width):
+        """Convert raw mono PCM audio to text; returns None if nothing was understood"""
+        try:
+            audio = sr.AudioData(pcm_data, sample_rate, sample_width)
+            return self.recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            return None
+        except Exception as e:
+            print(f"Speech recognition error: {e}")
+            return None
+    
+    def synthesize(self, text):
+        """Convert text to speech and return the audio bytes"""
+        audio_file_path = self.text_to_speech(text)
+        if not audio_file_path:
+            return None
+        try:
+            with open(audio_file_path, 'rb') as f:
+                return f.read()
+        finally:
+            self.cleanup_audio_file(audio_file_path)
+    
     def text_to_speech(self, text):
         """Convert text to speech and return audio file path"""
         try:
@@ -40,8 +63,9 @@ class SpeechModule:
             temp_file.close()
             
             # Save speech to file
-            self.tts_engine.save_to_file(text, temp_file.name)
-            self.tts_engine.runAndWait()
+            with self.tts_lock:
+                self.tts_engine.save_to_file(text, temp_file.name)
+                self.tts_engine.runAndWait()
             
             return temp_file.name
             
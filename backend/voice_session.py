@@ -0,0 +1,260 @@
+import json
+import queue
+import re
+import threading
+from array import array
+from flask import request
+from flask_jwt_extended import decode_token
+from simple_websocket import ConnectionClosed
+from ai_engine import ai_engine
+from speech_module import speech_module
+from chat_pipeline import run_action, build_prompt, format_sources
+
+SENTENCE_END = re.compile(r'(.+?[.!?:;]["\')\]]*)(?:\s+|$)', re.S)
+
+def split_sentences(buffer):
+    """Split complete sentences off the front of buffer; returns (sentences, remainder)"""
+    sentences = []
+    while True:
+        match = SENTENCE_END.match(buffer)
+        # Only treat the match as complete if more text follows it
+        if not match or match.end() == len(buffer) and not buffer[-1:].isspace():
+            break
+        sentences.append(match.group(1).strip())
+        buffer = buffer[match.end():]
+    return sentences, buffer
+
+class VoiceSession:
+    """One WebSocket voice conversation: audio in, text and synthesized speech out.
+
+    Protocol (client -> server):
+      {"type": "start", "sample_rate": 16000, "sample_width": 2, "utc_offset": -300}  then binary
+      frames of raw mono PCM. An utterance ends after `silence_ms` of quiet
+      audio following speech, explicitly with {"type": "end"}, or when it
+      reaches `max_utterance_seconds`.
+
+    Server -> client, per utterance:
+      {"type": "transcript", "text": ...}
+      {"type": "text", "delta": ...}            as the LLM streams
+      {"type": "audio", "sentence": ...}        followed by one binary frame
+      {"type": "done", "response": ...}
+
+    Replies are produced on a worker thread so frames keep being read while
+    the assistant speaks. Speech from the user during a reply stops any
+    further audio for it (barge-in); its text is still sent and saved.
+    """
+
+    SAMPLE_RATES = range(8000, 48001)
+    SAMPLE_WIDTHS = (1, 2, 4)
+
+    def __init__(self, ws, user_id, memory_manager, silence_ms=700, silence_threshold=500,
+                 max_utterance_seconds=30, max_queued_utterances=2):
+        self.ws = ws
+        self.user_id = user_id
+        self.memory_manager = memory_manager
+        self.silence_ms = silence_ms
+        self.silence_threshold = silence_threshold
+        self.max_utterance_seconds = max_utterance_seconds
+        self.sample_rate = 16000
+        self.sample_width = 2
+        self.utc_offset = None
+        self.send_lock = threading.Lock()
+        self.utterances = queue.Queue(maxsize=max_queued_utterances)
+        self.responding = threading.Event()
+        self.barge_in = threading.Event()
+        self.closed = threading.Event()
+        self.reset_utterance()
+
+    def reset_utterance(self):
+        self.audio = bytearray()
+        self.heard_speech = False
+        self.silent_bytes = 0
+
+    def send_json(self, payload):
+        with self.send_lock:
+            self.ws.send(json.dumps(payload))
+
+    def send_audio(self, sentence, audio):
+        # Keep the announcement and its binary frame together
+        with self.send_lock:
+            self.ws.send(json.dumps({'type': 'audio', 'sentence': sentence}))
+            self.ws.send(audio)
+
+    def run(self):
+        worker = threading.Thread(target=self._respond_loop, daemon=True)
+        worker.start()
+        try:
+            while True:
+                try:
+                    message = self.ws.receive()
+                except ConnectionClosed:
+                    break
+                if message is None:
+                    break
+                if isinstance(message, str):
+                    self.handle_control(json.loads(message))
+                else:
+                    self.handle_audio(message)
+        finally:
+            # Let the worker finish its current reply silently, then exit
+            self.closed.set()
+            self.barge_in.set()
+
+    def handle_control(self, payload):
+        if payload.get('type') == 'start':
+            sample_rate = int(payload.get('sample_rate', self.sample_rate))
+            sample_width = int(payload.get('sample_width', self.sample_width))
+            if sample_rate not in self.SAMPLE_RATES or sample_width not in self.SAMPLE_WIDTHS:
+                self.send_json({'type': 'error', 'error': 'Unsupported sample rate or width'})
+                return
+            self.sample_rate, self.sample_width = sample_rate, sample_width
+            if isinstance(payload.get('utc_offset'), int):
+                self.utc_offset = payload['utc_offset']
+            self.reset_utterance()
+        elif payload.get('type') == 'end':
+            self.finish_utterance()
+
+    def handle_audio(self, frame):
+        self.audio.extend(frame)
+        if len(self.audio) >= self.sample_rate * self.sample_width * self.max_utterance_seconds:
+            self.finish_utterance()
+            return
+        if self.sample_width != 2 or len(frame) < 2:
+            return  # Endpointing only for 16-bit audio; rely on "end" or the length cap otherwise
+
+        samples = array('h', frame[:len(frame) - len(frame) % 2])
+        rms = (sum(s * s for s in samples) / len(samples)) ** 0.5
+        if rms >= self.silence_threshold:
+            self.heard_speech = True
+            self.silent_bytes = 0
+            if self.responding.is_set():
+                self.barge_in.set()
+        elif self.heard_speech:
+            self.silent_bytes += len(frame)
+            silence_needed = self.sample_rate * self.sample_width * self.silence_ms // 1000
+            if self.silent_bytes >= silence_needed:
+                self.finish_utterance()
+
+    def finish_utterance(self):
+        audio = bytes(self.audio)
+        self.reset_utterance()
+        if not audio:
+            return
+        try:
+            self.utterances.put_nowait((audio, self.sample_rate, self.sample_width))
+        except queue.Full:
+            self.send_json({'type': 'error', 'error': 'Still answering; please wait for the reply'})
+
+    def _respond_loop(self):
+        while not self.closed.is_set():
+            try:
+                audio, sample_rate, sample_width = self.utterances.get(timeout=1)
+            except queue.Empty:
+                continue
+            self.barge_in.clear()
+            self.responding.set()
+            try:
+                text = speech_module.recognize_pcm(audio, sample_rate, sample_width)
+                if not text:
+                    self.send_json({'type': 'error', 'error': 'Sorry, I could not understand the audio'})
+                    continue
+                self.send_json({'type': 'transcript', 'text': text})
+                self.respond(text)
+            except ConnectionClosed:
+                return
+            except Exception as e:
+                print(f"Voice session response error: {e}")
+            finally:
+                self.responding.clear()
+
+    def respond(self, user_message):
+        user = self.memory_manager.get_user_by_id(self.user_id)
+        if not user:
+            self.send_json({'type': 'error', 'error': 'User not found'})
+            return
+        conversation_history = self.memory_manager.get_conversation_history(self.user_id)
+
+        action_result = run_action(self.user_id, user, user_message, utc_offset=self.utc_offset)
+        if action_result:
+            response = action_result['response']
+            self.send_json({'type': 'text', 'delta': response})
+            self.speak(response)
+        else:
+            prompt, search_results, shareable = build_prompt(user_message)
+            if shareable and not conversation_history:
+                # Can lead or join a coalesced call for identical questions, so it can't stream
+                response = ai_engine.generate_response(
+                    self.user_id, prompt, conversation_history, shareable=True
+                )
+                self.send_json({'type': 'text', 'delta': response})
+                sentences, rest = split_sentences(response + ' ')
+                for sentence in sentences + ([rest.strip()] if rest.strip() else []):
+                    self.speak(sentence)
+            else:
+                response = self.stream_and_speak(prompt, conversation_history)
+
+            # Sources are shown but not spoken
+            if search_results:
+                sources = format_sources(search_results)
+                self.send_json({'type': 'text', 'delta': sources})
+                response += sources
+
+        self.send_json({'type': 'done', 'response': response})
+        self.memory_manager.save_conversation(self.user_id, conversation_history + [
+            {'role': 'user', 'content': user_message},
+            {'role': 'assistant', 'content': response}
+        ])
+
+    def stream_and_speak(self, prompt, conversation_history):
+        """Stream LLM text while synthesizing finished sentences on this thread"""
+        chunks = queue.Queue()
+
+        def produce():
+            try:
+                for chunk in ai_engine.stream_response(self.user_id, prompt, conversation_history):
+                    chunks.put(chunk)
+            except Exception as e:
+                print(f"Voice session LLM error: {e}")
+            finally:
+                chunks.put(None)
+
+        threading.Thread(target=produce, daemon=True).start()
+
+        full_response, buffer = '', ''
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            full_response += chunk
+            buffer += chunk
+            self.send_json({'type': 'text', 'delta': chunk})
+            sentences, buffer = split_sentences(buffer)
+            for sentence in sentences:
+                self.speak(sentence)
+
+        if buffer.strip():
+            self.speak(buffer.strip())
+        return full_response
+
+    def speak(self, sentence):
+        if self.barge_in.is_set():
+            return  # The user started talking over the reply
+        audio = speech_module.synthesize(sentence)
+        if audio:
+            self.send_audio(sentence, audio)
+
+def register_routes(sock, memory_manager):
+
+    @sock.route('/api/voice')
+    def voice(ws):
+        # Browsers cannot set headers on WebSocket requests, so the JWT comes in the query string
+        try:
+            user_id = decode_token(request.args.get('token', ''))['sub']
+        except Exception:
+            ws.send(json.dumps({'type': 'error', 'error': 'Invalid or missing token'}))
+            return
+
+        try:
+            VoiceSession(ws, user_id, memory_manager).run()
+        except Exception as e:
+            print(f"Voice session error: {e}")
@@ -0,0 +1,123 @@
+import requests
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from singleflight import SingleFlight
+import config
+
+class OpenWeatherMapProvider:
+    """Current conditions from the OpenWeatherMap API"""
+
+    URL = 'https://api.openweathermap.org/data/2.5/weather'
+
+    def __init__(self, api_key, timeout=5):
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def current(self, city=None, lat=None, lon=None):
+        params = {'appid': self.api_key, 'units': 'metric'}
+        if city:
+            params['q'] = city
+        else:
+            params['lat'], params['lon'] = lat, lon
+
+        response = requests.get(self.URL, params=params, timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        data = response.json()
+
+        return {
+            'location': data.get('name') or city,
+            'temperature': data['main']['temp'],
+            'feels_like': data['main'].get('feels_like'),
+            'humidity': data['main'].get('humidity'),
+            'description': data['weather'][0]['description'] if data.get('weather') else '',
+            'wind_speed': data.get('wind', {}).get('speed')
+        }
+
+class LocalWeatherProvider:
+    """Deterministic stand-in provider for development and tests (no network)"""
+
+    DESCRIPTIONS = ['clear sky', 'few clouds', 'scattered clouds', 'light rain', 'overcast clouds']
+
+    def __init__(self):
+        self.calls = 0
+
+    def current(self, city=None, lat=None, lon=None):
+        self.calls += 1
+        location = city or f"{lat:.1f},{lon:.1f}"
+        seed = int(hashlib.md5(location.lower().encode()).hexdigest(), 16)
+        return {
+            'location': location.title() if city else location,
+            'temperature': round(5 + seed % 250 / 10, 1),
+            'feels_like': round(4 + seed % 250 / 10, 1),
+            'humidity': 30 + seed % 60,
+            'description': self.DESCRIPTIONS[seed % len(self.DESCRIPTIONS)],
+            'wind_speed': round(seed % 100 / 10, 1)
+        }
+
+class WeatherService:
+    """Provider wrapper with a bounded TTL cache and coalesced upstream lookups.
+
+    Cache keys are the normalized city name or coordinates rounded to
+    `precision` decimal places (~11 km at 1), so nearby lookups share an entry.
+    """
+
+    def __init__(self, provider, ttl=600, max_entries=10000, precision=1):
+        self.provider = provider
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.precision = precision
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.singleflight = SingleFlight()
+
+    def cache_key(self, city=None, lat=None, lon=None):
+        if city:
+            return ('city', ' '.join(city.lower().split()))
+        return ('geo', round(lat, self.precision), round(lon, self.precision))
+
+    def get_current(self, city=None, lat=None, lon=None):
+        """Return current weather for a city or coordinates, or None if unknown"""
+        if not city and (lat is None or lon is None):
+            raise ValueError('A city or both coordinates are required')
+
+        key = self.cache_key(city, lat, lon)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry and entry[0] > now:
+                self.cache.move_to_end(key)
+                return entry[1]
+
+        if city:
+            result, _ = self.singleflight.do(key, self._fetch, key, city=city)
+        else:
+            result, _ = self.singleflight.do(key, self._fetch, key, lat=key[1], lon=key[2])
+        return result
+
+    def _fetch(self, key, **location):
+        data = self.provider.current(**location)
+        with self.lock:
+            self.cache[key] = (time.monotonic() + self.ttl, data)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+        return data
+
+def create_weather_service():
+    """Build the weather service from config, or None when no provider is usable"""
+    provider_name = config.Config.WEATHER_PROVIDER
+    if provider_name == 'local':
+        provider = LocalWeatherProvider()
+    elif provider_name == 'openweathermap':
+        api_key = config.Config.WEATHER_API_KEY
+        if not api_key or api_key == 'your-openweathermap-api-key':
+            return None
+        provider = OpenWeatherMapProvider(api_key)
+    else:
+        print(f"Unknown weather provider: {provider_name}")
+        return None
+    return WeatherService(provider, ttl=config.Config.WEATHER_CACHE_TTL)
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from "react";
 import { BrowserRouter as Router, Routes, Route, Navigate } from "react-router-dom";
 import { initializeTheme } from "./utils/theme";
-import { authAPI, chatAPI } from "./api";
+import { authAPI, chatAPI, remindersAPI } from "./api";
 import Navbar from "./components/Navbar";
 import ChatWindow from "./components/ChatWindow";
 import Login from "./pages/Login";
@@ -23,6 +23,30 @@ function App() {
     checkAuthentication();
   }, []);
 
+  // Poll for reminders that have fired and show them in the chat
+  useEffect(() => {
+    if (!isAuthenticated) return;
+
+    const pollReminders = async () => {
+      try {
+        const response = await remindersAPI.getDue();
+        const reminders = response.data.reminders || [];
+        if (reminders.length > 0) {
+          setMessages((prev) => [
+            ...prev,
+            ...reminders.map((r) => ({ role: "assistant", content: `⏰ Reminder: ${r.text}` })),
+          ]);
+        }
+      } catch (error) {
+        console.error("Failed to fetch reminders:", error);
+      }
+    };
+
+    pollReminders();
+    const interval = setInterval(pollReminders, 30000);
+    return () => clearInterval(interval);
+  }, [isAuthenticated]);
+
   // ✅ FIXED authentication check
   const checkAuthentication = async () => {
     console.log("🔍 Checking authentication...");
@@ -90,21 +114,20 @@ const handleLogin = (userData) => {
   const handleSendMessage = async (message) => {
     if (!message.trim()) return;
     const newUserMessage = { role: "user", content: message };
-    const updatedMessages = [...messages, newUserMessage];
-    setMessages(updatedMessages);
+    setMessages((prev) => [...prev, newUserMessage]);
     setIsLoading(true);
 
     try {
       const response = await chatAPI.sendMessage(message);
       const aiMessage = { role: "assistant", content: response.data.response };
-      setMessages([...updatedMessages, aiMessage]);
+      setMessages((prev) => [...prev, aiMessage]);
     } catch (error) {
       console.error("Failed to send message:", error);
       const errorMessage = {
         role: "assistant",
         content: "Sorry, I encountered an error. Please try again.",
       };
-      setMessages([...updatedMessages, errorMessage]);
+      setMessages((prev) => [...prev, errorMessage]);
     } finally {
       setIsLoading(false);
     }
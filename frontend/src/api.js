@@ -47,7 +47,9 @@ export const authAPI = {
 
 // ------------------- CHAT API -------------------
 export const chatAPI = {
-  sendMessage: (message) => api.post("/chat", { message }),
+  // utc_offset (minutes east of UTC) lets the backend read times like "at 5pm" in the user's timezone
+  sendMessage: (message) =>
+    api.post("/chat", { message, utc_offset: -new Date().getTimezoneOffset() }),
   speechToText: (audioFile) => {
     const formData = new FormData();
     formData.append("audio", audioFile);
@@ -60,6 +62,11 @@ export const chatAPI = {
   clearHistory: () => api.post("/chat/clear"),
 };
 
+// ------------------- REMINDERS API -------------------
+export const remindersAPI = {
+  getDue: () => api.get("/reminders/due"),
+};
+
 // ------------------- HEALTH CHECK -------------------
 export const healthCheck = () => api.get("/health");
 